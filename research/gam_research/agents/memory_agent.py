@@ -42,7 +42,7 @@ class MemoryAgent:
         if generator is None:
             raise ValueError("Generator instance is required for MemoryAgent")
         self.memory_store = memory_store or InMemoryMemoryStore(dir_path=dir_path)
-        self.page_store = page_store or InMemoryPageStore(dir_path=dir_path)
+        self.page_store = page_store if page_store is not None else InMemoryPageStore(dir_path=dir_path)  # 空的 TTLPageStore 也视为已传入
         self.generator = generator
         
         # 初始化 system_prompts，默认值为空字符串
@@ -456,12 +456,18 @@ class ResearchAgent:
                 print(f"Error in keyword search: {e}")
                 return []
         # naive fallback: scan pages for substring
+        # 页面只加载一次，小写文本按需计算并在多个 query 之间复用
+        pages = self.page_store.load()
+        lowered: List[Optional[Tuple[str, str]]] = [None] * len(pages)
         out: List[List[Hit]] = []
         for query in query_list:
             query_hits: List[Hit] = []
             q = query.lower()
-            for i, p in enumerate(self.page_store.load()):
-                if q in p.content.lower() or q in p.header.lower():
+            for i, p in enumerate(pages):
+                texts = lowered[i]
+                if texts is None:
+                    texts = lowered[i] = (p.content.lower(), p.header.lower())
+                if q in texts[0] or q in texts[1]:
                     snippet = p.content
                     query_hits.append(Hit(page_id=str(i), snippet=snippet, source="keyword", meta={}))
                     if len(query_hits) >= top_k:
@@ -17,6 +17,13 @@ class DenseRetrieverConfig:
     max_length: int = 512
     index_dir: str = "./index/dense"
     api_url: str | None = None
+    api_chunk_size: int = 128
+    use_emb_cache: bool = True
+    emb_cache_max_parts: int = 16  # 向量缓存分片数超过该值时在 update() 中合并
+    quantization: str | None = None  # None / "fp16" / "int8"
+    index_type: str = "flat"  # "flat" / "hnsw"
+    hnsw_m: int = 32
+    hnsw_ef_search: int = 64
 
 
 @dataclass
@@ -34,6 +34,15 @@ class OpenAIGenerator(AbsGenerator):
         if self.base_url is not None:
             os.environ["OPENAI_BASE_URL"] = self.base_url
 
+        # 客户端在首次调用时创建并复用（共享底层 httpx 连接池）
+        self._cclient: Optional[OpenAI] = None
+
+    def _get_client(self) -> OpenAI:
+        if self._cclient is None:
+            client = OpenAI(api_key=self.api_key, base_url=self.base_url.rstrip("/") if self.base_url else None)
+            # 某些 openai 版本支持 with_options
+            self._cclient = client.with_options(timeout=self.timeout) if hasattr(client, "with_options") else client
+        return self._cclient
 
     def generate_single(
         self,
@@ -72,8 +81,7 @@ class OpenAIGenerator(AbsGenerator):
                 }
             }
 
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url.rstrip("/") if self.base_url else None)
-        cclient = client.with_options(timeout=self.timeout) if hasattr(client, "with_options") else client
+        cclient = self._get_client()
 
         params: Dict[str, Any] = {
             "model": self.model_name,
@@ -7,7 +7,7 @@ except ImportError:
     LuceneSearcher = None  # type: ignore
 
 from gam_research.retriever.base import AbsRetriever
-from gam_research.schemas import InMemoryPageStore, Hit, Page
+from gam_research.schemas import InMemoryPageStore, Hit
 
 
 def _safe_rmtree(path: str, max_retries: int = 3, delay: float = 0.5) -> None:
@@ -60,7 +60,8 @@ class BM25Retriever(AbsRetriever):
             raise ImportError("BM25Retriever requires pyserini to be installed")
         self.index_dir = self.config["index_dir"]
         self.searcher: LuceneSearcher | None = None
-        self.pages: List[Page] = []
+        # search() 只需要按 docid 取 content，只保留这一列而不是整个 Page 列表
+        self.contents: List[str] = []
 
     def _pages_dir(self):
         return os.path.join(self.index_dir, "pages")
@@ -75,7 +76,7 @@ class BM25Retriever(AbsRetriever):
         # 尝试从磁盘恢复
         if not os.path.exists(self._lucene_dir()):
             raise RuntimeError("BM25 index not found, need build() first.")
-        self.pages = InMemoryPageStore.load(self._pages_dir()).load()
+        self.contents = [p.content for p in InMemoryPageStore(self._pages_dir()).load()]
         self.searcher = LuceneSearcher(self._lucene_dir())  # type: ignore
 
     def build(self, page_store: InMemoryPageStore) -> None:
@@ -88,16 +89,21 @@ class BM25Retriever(AbsRetriever):
         os.makedirs(self.index_dir, exist_ok=True)
         os.makedirs(self._docs_dir(), exist_ok=True)
 
-        # 2. dump pages -> documents.jsonl (pyserini需要 id + contents)
+        # 2. dump pages -> documents*.jsonl (pyserini需要 id + contents)
+        # JsonCollection 按文件分配索引线程，单个文件只会用到一个线程；
+        # 因此按 threads 切成多个连续分片，让 --threads 真正并行
         pages = page_store.load()
-        docs_path = os.path.join(self._docs_dir(), "documents.jsonl")
-        with open(docs_path, "w", encoding="utf-8") as f:
-            for i, p in enumerate(pages):
-                text = (p.header + " " + p.content).strip()
-                text = '\n'.join(p.content.split('\n')[1:])
-                text = p.content
-                json.dump({"id": str(i), "contents": text}, f, ensure_ascii=False)
-                f.write("\n")
+        threads = max(1, int(self.config.get("threads", 1)))
+        num_shards = max(1, min(threads, len(pages)))
+        shard_size = -(-len(pages) // num_shards) if pages else 0
+        for shard in range(num_shards):
+            name = "documents.jsonl" if num_shards == 1 else f"documents_{shard:03d}.jsonl"
+            docs_path = os.path.join(self._docs_dir(), name)
+            start = shard * shard_size
+            with open(docs_path, "w", encoding="utf-8") as f:
+                for i in range(start, min(start + shard_size, len(pages))):
+                    # 只索引 content；整行一次编码写出，避免 json.dump 的分块写入
+                    f.write(json.dumps({"id": str(i), "contents": pages[i].content}, ensure_ascii=False) + "\n")
 
         # 3. 确保 lucene index 目录是干净的
         os.makedirs(self._lucene_dir(), exist_ok=True)
@@ -109,7 +115,7 @@ class BM25Retriever(AbsRetriever):
             "--input", self._docs_dir(),
             "--index", self._lucene_dir(),
             "--generator", "DefaultLuceneDocumentGenerator",
-            "--threads", str(self.config.get("threads", 1)),
+            "--threads", str(threads),
             "--storePositions", "--storeDocvectors", "--storeRaw"
         ]
         
@@ -137,7 +143,7 @@ class BM25Retriever(AbsRetriever):
         temp_page_store.save(pages)
         
         # 6. 更新内存镜像
-        self.pages = pages
+        self.contents = [p.content for p in pages]
         self.searcher = LuceneSearcher(self._lucene_dir())  # type: ignore
 
     def update(self, page_store: InMemoryPageStore) -> None:
@@ -150,26 +156,31 @@ class BM25Retriever(AbsRetriever):
             # 容错：如果忘了 load/build
             self.load()
 
-        results_all: List[List[Hit]] = []
-        for q in query_list:
-            q = q.strip()
-            if not q:
-                results_all.append([])
-                continue
+        # 多个 query 走 batch_search，一次调用由 Lucene 侧多线程完成，而不是逐条往返
+        queries = [(qid, q.strip()) for qid, q in enumerate(query_list) if q.strip()]
+        if len(queries) > 1:
+            batch_hits = self.searcher.batch_search(
+                [q for _, q in queries],
+                [str(qid) for qid, _ in queries],
+                k=top_k,
+                threads=self.config.get("threads", 1),
+            )
+            hits_by_qid = {qid: batch_hits.get(str(qid), []) for qid, _ in queries}
+        else:
+            hits_by_qid = {qid: self.searcher.search(q, k=top_k) for qid, q in queries}
 
+        results_all: List[List[Hit]] = []
+        for qid in range(len(query_list)):
             hits_for_q = []
-            py_hits = self.searcher.search(q, k=top_k)
-            for rank, h in enumerate(py_hits):
+            for rank, h in enumerate(hits_by_qid.get(qid, [])):
                 # h.docid 是字符串 id
                 idx = int(h.docid)
-                if idx < 0 or idx >= len(self.pages):
+                if idx < 0 or idx >= len(self.contents):
                     continue
-                page = self.pages[idx]
-                snippet = page.content
                 hits_for_q.append(
-                    Hit(
+                    Hit.model_construct(
                         page_id=str(idx),
-                        snippet=snippet,
+                        snippet=self.contents[idx],
                         source="keyword",
                         meta={"rank": rank, "score": float(h.score)}
                     )
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import hashlib
 import numpy as np
 import requests
 from typing import Dict, Any, List, Optional
@@ -10,17 +12,60 @@ from gam_research.retriever.base import AbsRetriever
 from gam_research.schemas import InMemoryPageStore, Hit, Page
 
 
-def _build_faiss_index(embeddings: np.ndarray) -> faiss.Index:
+_QUANTIZERS = {
+    "fp16": "QT_fp16",
+    "int8": "QT_8bit",
+}
+
+
+def _l2_normalized(embeddings: np.ndarray) -> np.ndarray:
+    """
+    返回 L2 归一化后的 float32 副本（不修改原始数据），用于 cosine similarity
+    一次除法即得到新数组，同时保证 faiss 需要的 float32 / C 连续布局；零向量保持为零
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return np.ascontiguousarray(embeddings / np.maximum(norms, np.float32(1e-12)))
+
+
+def _build_faiss_index(
+    embeddings: np.ndarray,
+    quantization: Optional[str] = None,
+    index_type: str = "flat",
+    hnsw_m: int = 32,
+    hnsw_ef_search: int = 64,
+) -> faiss.Index:
     """
     构建 FAISS 索引
     embeddings: (n, dim) 的 numpy 数组
+    quantization: None 为 float32 精确索引；"fp16" / "int8" 使用标量量化存储，
+                  分别把向量内存降为 1/2 和 1/4，打分时带宽也相应减少
+    index_type: "flat" 为暴力精确检索；"hnsw" 为 HNSW 图近似检索，
+                大规模语料下检索复杂度为亚线性
     """
     dimension = embeddings.shape[1]
-    # 使用内积索引（cosine similarity）
-    index = faiss.IndexFlatIP(dimension)
-    # L2 归一化以支持 cosine similarity（复制数组以避免修改原始数据）
-    embeddings_normalized = embeddings.copy()
-    faiss.normalize_L2(embeddings_normalized)
+    if quantization is not None and quantization not in _QUANTIZERS:
+        raise ValueError(f"Unsupported quantization: {quantization!r}, expected one of {list(_QUANTIZERS)}")
+    qtype = getattr(faiss.ScalarQuantizer, _QUANTIZERS[quantization]) if quantization else None
+
+    if index_type == "flat":
+        if qtype is None:
+            # 使用内积索引（cosine similarity）
+            index = faiss.IndexFlatIP(dimension)
+        else:
+            index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "hnsw":
+        if qtype is None:
+            index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWSQ(dimension, qtype, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = hnsw_ef_search
+    else:
+        raise ValueError(f"Unsupported index_type: {index_type!r}, expected 'flat' or 'hnsw'")
+    embeddings_normalized = _l2_normalized(embeddings)
+    if not index.is_trained:
+        # int8 需要先统计每一维的取值范围
+        index.train(embeddings_normalized)
     index.add(embeddings_normalized)
     return index
 
@@ -31,19 +76,11 @@ def _search_faiss_index(index: faiss.Index, query_embeddings: np.ndarray, top_k:
     index: FAISS 索引
     query_embeddings: (n_queries, dim) 的查询向量
     top_k: 返回的 top-k 结果数
-    返回: (scores_list, indices_list) 其中每个元素都是 (top_k,) 的数组
+    返回: (scores, indices)，均为 (n_queries, top_k) 的数组
     """
-    # L2 归一化查询向量（复制以避免修改原始数据）
-    query_embeddings_normalized = query_embeddings.copy()
-    faiss.normalize_L2(query_embeddings_normalized)
-    
     # 搜索
-    scores, indices = index.search(query_embeddings_normalized, top_k)
-    
-    scores_list = [scores[i] for i in range(len(query_embeddings))]
-    indices_list = [indices[i] for i in range(len(query_embeddings))]
-    
-    return scores_list, indices_list
+    scores, indices = index.search(_l2_normalized(query_embeddings), top_k)
+    return scores, indices
 
 
 class DenseRetriever(AbsRetriever):
@@ -114,6 +151,141 @@ class DenseRetriever(AbsRetriever):
     def _emb_path(self) -> str:
         return os.path.join(self._index_dir(), "doc_emb.npy")
 
+    def _save_emb(self) -> None:
+        """
+        写 doc_emb.npy：先写临时文件再原子替换，
+        避免截断仍被 load() 以 mmap 方式映射着的旧文件
+        """
+        tmp_path = self._emb_path() + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, self.doc_emb)
+        os.replace(tmp_path, self._emb_path())
+
+    def _build_index(self, embeddings: np.ndarray) -> faiss.Index:
+        return _build_faiss_index(
+            embeddings,
+            quantization=self.config.get("quantization"),
+            index_type=self.config.get("index_type", "flat"),
+            hnsw_m=self.config.get("hnsw_m", 32),
+            hnsw_ef_search=self.config.get("hnsw_ef_search", 64),
+        )
+
+    # 向量缓存：index_dir/emb_cache/ 下的 part_NNNNNN.npz 分片，每个分片只含写入时新编码的向量，
+    # 所以一次 update() 的写盘量只与新增页面数有关；build() 时合并为当前语料一个分片（顺带清理旧向量）
+    def _emb_cache_dir(self) -> str:
+        return os.path.join(self._index_dir(), "emb_cache")
+
+    def _emb_cache_parts(self) -> List[str]:
+        cache_dir = self._emb_cache_dir()
+        if not os.path.isdir(cache_dir):
+            return []
+        return sorted(
+            os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+            if name.startswith("part_") and name.endswith(".npz")
+        )
+
+    def _emb_keys(self, texts: List[str]) -> List[str]:
+        # 模型 / API 地址和会影响向量的编码参数都计入 key，改配置后不会命中旧向量
+        tag = "\0".join(str(v) for v in (
+            self.api_url if self.use_api else self.config.get("model_name", ""),
+            self.config.get("model_class"),
+            self.config.get("max_length", 512),
+            self.config.get("pooling_method", "cls"),
+            self.config.get("normalize_embeddings", True),
+        ))
+        return [
+            hashlib.blake2b(f"{tag}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+            for text in texts
+        ]
+
+    def _load_emb_cache(self, keys: set) -> Dict[str, np.ndarray]:
+        """逐个分片读取，只保留 keys 中用得到的向量"""
+        found: Dict[str, np.ndarray] = {}
+        for path in self._emb_cache_parts():
+            try:
+                with np.load(path) as data:
+                    part_keys = data["keys"].tolist()
+                    hit = [i for i, k in enumerate(part_keys) if k in keys and k not in found]
+                    if hit:
+                        found.update(zip((part_keys[i] for i in hit), data["embs"][hit]))
+            except Exception as e:
+                print(f"[DenseRetriever] 警告: 向量缓存分片读取失败，将重新编码: {path}: {e}")
+        return found
+
+    def _write_emb_cache_part(self, keys: List[str], embs: np.ndarray) -> None:
+        parts = self._emb_cache_parts()
+        seq = int(os.path.basename(parts[-1])[len("part_"):-len(".npz")]) + 1 if parts else 0
+        os.makedirs(self._emb_cache_dir(), exist_ok=True)
+        path = os.path.join(self._emb_cache_dir(), f"part_{seq:06d}.npz")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(keys), embs=np.asarray(embs, dtype=np.float32))
+        os.replace(tmp_path, path)
+
+    def _compact_emb_cache(self, pages: List[Page], embs: np.ndarray) -> None:
+        """把缓存重写为当前语料的一个分片，已删除 / 已修改页面的旧向量随之清掉"""
+        if not self.config.get("use_emb_cache", True):
+            return
+        old_parts = self._emb_cache_parts()
+        # key -> 该文本最后一次出现的行号（重复文本只存一份）
+        rows = dict(zip(self._emb_keys([p.content for p in pages]), range(len(pages))))
+        try:
+            if rows:
+                self._write_emb_cache_part(list(rows), np.asarray(embs)[list(rows.values())])
+            for path in old_parts:
+                os.remove(path)
+        except Exception as e:
+            print(f"[DenseRetriever] 警告: 向量缓存合并失败: {e}")
+
+    def _post_encode(self, texts: List[str], encode_type: str, max_retries: int = 3) -> np.ndarray:
+        """
+        向 API 发送一个分块的编码请求，网络错误时重试
+        """
+        request_data = {
+            "texts": texts,
+            "type": encode_type,
+            "batch_size": self.config.get("batch_size", 32),
+            "max_length": self.config.get("max_length", 512),
+        }
+
+        times = 0
+        while True:
+            try:
+                response = requests.post(
+                    f"{self.api_url}/encode",
+                    json=request_data,
+                    timeout=300  # 5分钟超时，大批量编码可能需要较长时间
+                )
+                break
+            except requests.exceptions.RequestException as e:
+                times += 1
+                if times >= max_retries:
+                    raise
+                print(f"[DenseRetriever] API 请求失败，重试 {times}/{max_retries}: {e}")
+                time.sleep(1)
+
+        # 如果请求失败，打印详细的错误信息
+        if response.status_code != 200:
+            error_detail = ""
+            try:
+                error_response = response.json()
+                error_detail = f" 服务器错误信息: {error_response}"
+            except:
+                error_detail = f" 响应内容: {response.text[:500]}"
+
+            error_msg = (
+                f"[DenseRetriever] API 编码失败: {response.status_code} {response.reason}\n"
+                f"  请求URL: {self.api_url}/encode\n"
+                f"  请求参数: texts数量={len(texts)}, type={encode_type}, "
+                f"batch_size={request_data['batch_size']}, max_length={request_data['max_length']}\n"
+                f"{error_detail}"
+            )
+            print(error_msg)
+            response.raise_for_status()
+
+        result = response.json()
+        return np.array(result["embeddings"], dtype=np.float32)
+
     def _encode_via_api(self, texts: List[str], encode_type: str = "corpus") -> np.ndarray:
         """
         通过 API 编码文本
@@ -138,52 +310,22 @@ class DenseRetriever(AbsRetriever):
             print(f"[DenseRetriever] 警告: 过滤掉了 {len(texts) - len(non_empty_texts)} 个空文本")
         
         try:
-            request_data = {
-                "texts": non_empty_texts,
-                "type": encode_type,
-                "batch_size": self.config.get("batch_size", 32),
-                "max_length": self.config.get("max_length", 512),
-            }
-            
-            response = requests.post(
-                f"{self.api_url}/encode",
-                json=request_data,
-                timeout=300  # 5分钟超时，大批量编码可能需要较长时间
-            )
-            
-            # 如果请求失败，打印详细的错误信息
-            if response.status_code != 200:
-                error_detail = ""
-                try:
-                    error_response = response.json()
-                    error_detail = f" 服务器错误信息: {error_response}"
-                except:
-                    error_detail = f" 响应内容: {response.text[:500]}"
-                
-                error_msg = (
-                    f"[DenseRetriever] API 编码失败: {response.status_code} {response.reason}\n"
-                    f"  请求URL: {self.api_url}/encode\n"
-                    f"  请求参数: texts数量={len(non_empty_texts)}, type={encode_type}, "
-                    f"batch_size={request_data['batch_size']}, max_length={request_data['max_length']}\n"
-                    f"{error_detail}"
-                )
-                print(error_msg)
-                response.raise_for_status()
-            
-            result = response.json()
-            embeddings = np.array(result["embeddings"], dtype=np.float32)
+            # 分块请求，避免单个请求过大触发服务端限制或超时
+            chunk_size = self.config.get("api_chunk_size", 128)
+            chunk_embs = [
+                self._post_encode(non_empty_texts[i:i + chunk_size], encode_type)
+                for i in range(0, len(non_empty_texts), chunk_size)
+            ]
+            embeddings = np.concatenate(chunk_embs, axis=0)
             
             # 如果过滤了空文本，需要补充空向量以保持索引对应
             if len(non_empty_texts) != len(texts):
-                # 找到空文本的位置
-                empty_indices = [i for i, t in enumerate(texts) if not t or not t.strip()]
-                # 构建完整的 embeddings 数组
+                non_empty_mask = np.fromiter(
+                    (bool(t and t.strip()) for t in texts), dtype=bool, count=len(texts)
+                )
+                # 构建完整的 embeddings 数组，一次性按掩码写入非空位置
                 full_embeddings = np.zeros((len(texts), embeddings.shape[1]), dtype=np.float32)
-                non_empty_idx = 0
-                for i in range(len(texts)):
-                    if i not in empty_indices:
-                        full_embeddings[i] = embeddings[non_empty_idx]
-                        non_empty_idx += 1
+                full_embeddings[non_empty_mask] = embeddings
                 embeddings = full_embeddings
             
             return embeddings
@@ -202,16 +344,31 @@ class DenseRetriever(AbsRetriever):
             raise
 
     def _encode_pages(self, pages: List[Page]) -> np.ndarray:
-        # 和 build() / update() 保持一致的编码方式
-        # 处理可能的 None 值
-        texts = []
-        for p in pages:
-            header = p.header if p.header is not None else ""
-            content = p.content if p.content is not None else ""
-            text = (header + " " + content).strip()
-            text = p.content
-            texts.append(text)
-        
+        # 和 build() / update() 保持一致的编码方式：只编码 content
+        # （Page.content 是必填的 str，不需要 None 兜底）
+        texts = [p.content for p in pages]
+
+        if not texts or not self.config.get("use_emb_cache", True):
+            return self._encode_texts(texts)
+
+        # 只编码缓存中没有的文本，重启或增量更新时不再全量调用编码；
+        # 缓存只在本次调用内存在，返回的矩阵是拷贝，不会和缓存一起常驻内存
+        keys = self._emb_keys(texts)
+        cache = self._load_emb_cache(set(keys))
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cache:
+                missing.setdefault(key, text)
+        if missing:
+            new_emb = np.asarray(self._encode_texts(list(missing.values())), dtype=np.float32)
+            cache.update(zip(missing.keys(), new_emb))
+            try:
+                self._write_emb_cache_part(list(missing.keys()), new_emb)
+            except Exception as e:
+                print(f"[DenseRetriever] 警告: 向量缓存写入失败: {e}")
+        return np.stack([cache[k] for k in keys])
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
         if self.use_api:
             # API 模式
             return self._encode_via_api(texts, encode_type="corpus")
@@ -235,12 +392,13 @@ class DenseRetriever(AbsRetriever):
         """
         # 如果load失败，不抛死，只打印，这样ResearchAgent可以再走build()
         try:
-            # 读向量
-            self.doc_emb = np.load(self._emb_path())
+            # 读向量：以只读 mmap 方式打开，faiss 索引自己持有一份拷贝，
+            # doc_emb 只在 update() 时按需读取，交给 OS page cache 即可
+            self.doc_emb = np.load(self._emb_path(), mmap_mode="r")
             # 重建 index
-            self.index = _build_faiss_index(self.doc_emb)
+            self.index = self._build_index(self.doc_emb)
             # 读 pages
-            self.pages = InMemoryPageStore.load(self._pages_dir()).load()
+            self.pages = InMemoryPageStore(self._pages_dir()).load()
         except Exception as e:
             print("DenseRetriever.load() failed, will need build():", e)
 
@@ -257,13 +415,14 @@ class DenseRetriever(AbsRetriever):
         self.doc_emb = self._encode_pages(self.pages)
 
         # 3. 建 faiss 索引
-        self.index = _build_faiss_index(self.doc_emb)
+        self.index = self._build_index(self.doc_emb)
 
         # 4. 持久化
         # 创建临时 PageStore 实例来保存
         temp_page_store = InMemoryPageStore(dir_path=self._pages_dir())
         temp_page_store.save(self.pages)
-        np.save(self._emb_path(), self.doc_emb)
+        self._save_emb()
+        self._compact_emb_cache(self.pages, self.doc_emb)
 
     def update(self, page_store: InMemoryPageStore) -> None:
         """
@@ -301,8 +460,15 @@ class DenseRetriever(AbsRetriever):
 
         new_doc_emb = np.concatenate([keep_emb, tail_emb], axis=0)
 
-        # 4. 重新建 faiss 索引
-        self.index = _build_faiss_index(new_doc_emb)
+        # 4. 只是在末尾追加了新 Page 时，把新向量直接加入现有索引；否则重新建 faiss 索引
+        if diff_idx == len(old_pages):
+            self.index.add(_l2_normalized(tail_emb))
+        else:
+            self.index = self._build_index(new_doc_emb)
+
+        # 分片过多时合并一次，顺带清理不再使用的向量
+        if len(self._emb_cache_parts()) > self.config.get("emb_cache_max_parts", 16):
+            self._compact_emb_cache(new_pages, new_doc_emb)
 
         # 5. 持久化 + 刷内存
         # 更新内存
@@ -312,7 +478,7 @@ class DenseRetriever(AbsRetriever):
         # 创建临时 PageStore 实例来保存
         temp_page_store = InMemoryPageStore(dir_path=self._pages_dir())
         temp_page_store.save(self.pages)
-        np.save(self._emb_path(), self.doc_emb)
+        self._save_emb()
 
     def search(self, query_list: List[str], top_k: int = 10) -> List[List[Hit]]:
         """
@@ -340,55 +506,36 @@ class DenseRetriever(AbsRetriever):
             )
 
         # 使用自定义的 search 函数
-        scores_list, indices_list = _search_faiss_index(self.index, queries_emb, top_k)
+        scores, indices = _search_faiss_index(self.index, queries_emb, top_k)
 
         # 按 page_id 聚合得分：如果同一个 page 被多个 query 搜索到，累加得分
-        page_scores: Dict[str, float] = {}  # page_id -> 累计得分
-        page_hits: Dict[str, Hit] = {}      # page_id -> Hit对象（保存第一个遇到的Hit作为代表）
-
-        for scores, indices in zip(scores_list, indices_list):
-            for rank, (idx, sc) in enumerate(zip(indices, scores)):
-                idx_int = int(idx)
-                if idx_int < 0 or idx_int >= len(self.pages):
-                    continue
-                page = self.pages[idx_int]
-                snippet = page.content
-                page_id = str(idx_int)
-                score = float(sc)
-
-                if page_id in page_scores:
-                    # 累加得分
-                    page_scores[page_id] += score
-                else:
-                    # 第一次遇到这个page，保存得分和Hit对象
-                    page_scores[page_id] = score
-                    page_hits[page_id] = Hit(
-                        page_id=page_id,
-                        snippet=snippet,
-                        source="vector",
-                        meta={"rank": rank, "score": score},
-                    )
-
-        # 按总分排序，取 top k
-        sorted_pages = sorted(page_scores.items(), key=lambda x: x[1], reverse=True)
-        top_k_pages = sorted_pages[:top_k]
+        # faiss 在结果不足 top_k 时会返回 -1，先整体过滤掉
+        valid = (indices >= 0) & (indices < len(self.pages))
+        flat_idx = indices[valid].astype(np.int64)
+        if flat_idx.size == 0:
+            return [[]]
+        totals = np.bincount(flat_idx, weights=scores[valid].astype(np.float64))
+
+        # 按首次出现的顺序排列命中的 page，保证同分时的顺序与逐条累加时一致
+        uniq, first_pos = np.unique(flat_idx, return_index=True)
+        hit_ids = uniq[np.argsort(first_pos)]
+        hit_scores = totals[hit_ids]
+
+        # 按总分排序（稳定排序），取 top k
+        order = np.argsort(-hit_scores, kind="stable")[:top_k]
 
         # 构建最终的hits列表（使用累加后的得分）
         final_hits: List[Hit] = []
-        for rank, (page_id, total_score) in enumerate(top_k_pages):
-            hit = page_hits[page_id]
-            # 更新meta中的得分为累加后的总分
-            updated_meta = hit.meta.copy() if hit.meta else {}
-            updated_meta["rank"] = rank
-            updated_meta["score"] = total_score
+        for rank, pos in enumerate(order):
+            idx_int = int(hit_ids[pos])
             final_hits.append(
-                Hit(
-                    page_id=hit.page_id,
-                    snippet=hit.snippet,
-                    source=hit.source,
-                    meta=updated_meta
+                Hit.model_construct(
+                    page_id=str(idx_int),
+                    snippet=self.pages[idx_int].content,
+                    source="vector",
+                    meta={"rank": rank, "score": float(hit_scores[pos])}
                 )
             )
 
         # 返回 List[List[Hit]] 格式（只有一个列表，即聚合后的结果）
-        return [final_hits]
\ No newline at end of file
+        return [final_hits]
@@ -45,7 +45,7 @@ class IndexRetriever(AbsRetriever):
                 p = self.page_store.get(pid)
                 if not p:
                     continue
-                hits.append(Hit(
+                hits.append(Hit.model_construct(
                     page_id=str(pid),  # 使用页面索引作为page_id
                     snippet=p.content,
                     source="page_index",
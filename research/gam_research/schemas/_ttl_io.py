@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+NDJSON log and timestamp helpers shared by the TTL memory and page stores.
+
+Each store persists to an append-only NDJSON log (one item per line). The
+single-JSON file written by older versions is migrated into the log on first
+load and left untouched afterwards; the log takes precedence.
+"""
+
+from __future__ import annotations
+from typing import Any, Iterable, List, Optional, Tuple, TypeVar, Union
+from array import array
+from datetime import datetime
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson when installed, stdlib json otherwise)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # e.g. non-str dict keys or ints beyond 64 bits, which stdlib json
+            # accepts: what gets written must not depend on orjson being installed
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def iso_to_epoch(value: str) -> float:
+    """Convert a legacy ISO format timestamp to POSIX epoch seconds."""
+    # A trailing 'Z' is the only non-isoformat() suffix writers have produced
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value).timestamp()
+
+
+def write_lines_atomic(path: Path, lines: Iterable[bytes]) -> None:
+    """Replace path with the given lines via a tmp file + rename (tmp removed on failure)"""
+    tmp_file = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.writelines(lines)
+        # Readers see either the old file or the new one, never a partial rewrite
+        os.replace(tmp_file, path)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+
+T = TypeVar("T")
+Keep = Union[slice, np.ndarray]
+
+
+def gather(items: List[T], keep: Keep) -> List[T]:
+    """The items selected by a TimestampColumn.partition() keep index"""
+    if isinstance(keep, slice):
+        return items[keep]
+    return [items[i] for i in keep.tolist()]
+
+
+class TimestampColumn:
+    """
+    Epoch timestamps of a TTL store's items, parallel to its item list.
+    
+    Timestamps are kept in a flat float64 column (inf for items that never
+    expire) together with two pieces of derived state:
+    
+    - sorted: whether the column is non-decreasing, true while items are only
+      appended; expired items then form a prefix found with one binary search
+    - next_expiry: when the oldest item expires; until then nothing is due and
+      load()/get_stats() can skip scanning
+    """
+    
+    def __init__(self, ttl_seconds: Optional[float], values: Iterable[float] = ()) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.reset(values)
+    
+    def reset(self, values: Iterable[float]) -> None:
+        """Replace the column, recomputing the sorted flag and the deadline."""
+        self._ts = values if isinstance(values, array) else array('d', values)
+        ts = self.view()
+        self.sorted = bool(np.all(ts[1:] >= ts[:-1]))
+        self.refresh_deadline()
+    
+    def __len__(self) -> int:
+        return len(self._ts)
+    
+    def __getitem__(self, index: int) -> float:
+        return self._ts[index]
+    
+    def view(self) -> np.ndarray:
+        """The column as a float64 array (zero-copy)."""
+        return np.frombuffer(self._ts, dtype=np.float64)
+    
+    def append(self, ts: float) -> None:
+        if self._ts and ts < self._ts[-1]:
+            self.sorted = False  # clock stepped backwards, or earlier items never expire
+        self._ts.append(ts)
+        if self.ttl_seconds is not None and math.isfinite(ts):
+            # min(): after a backwards clock step the new item can expire first
+            deadline = ts + self.ttl_seconds
+            self.next_expiry = deadline if self.next_expiry is None else min(self.next_expiry, deadline)
+    
+    def refresh_deadline(self) -> None:
+        """Recompute next_expiry from the oldest finite timestamp."""
+        ts = self.view()
+        if self.ttl_seconds is None or not ts.size:
+            self.next_expiry = None
+            return
+        oldest = ts[0] if self.sorted else ts.min()
+        self.next_expiry = float(oldest) + self.ttl_seconds if math.isfinite(oldest) else None
+    
+    def due(self) -> bool:
+        """Whether the next expiration deadline has been reached."""
+        return self.next_expiry is not None and time.time() >= self.next_expiry
+    
+    def partition(self, cutoff: float) -> Tuple[Keep, int]:
+        """
+        Split the items at the cutoff with one pass over the column.
+        
+        Returns:
+            (keep, expired_count); keep indexes the surviving items: a slice
+            past the expired prefix when sorted, otherwise an index array
+        """
+        ts = self.view()
+        if self.sorted:
+            # Expired items are exactly the prefix up to the cutoff
+            start = int(np.searchsorted(ts, cutoff, side='right'))
+            return slice(start, None), start
+        # Otherwise build the keep-mask with one vectorized compare
+        keep = np.flatnonzero(ts > cutoff)
+        return keep, len(ts) - keep.size
+    
+    def take(self, keep: Keep) -> None:
+        """Keep only the timestamps selected by a partition() keep index."""
+        kept = self.view()[keep]
+        if not isinstance(keep, slice):
+            self.sorted = bool(np.all(kept[1:] >= kept[:-1]))
+        self._ts = array('d', kept.tobytes())
+        self.refresh_deadline()
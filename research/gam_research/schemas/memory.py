@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Set
 from pydantic import BaseModel, Field
 import json
 from pathlib import Path
@@ -27,6 +27,8 @@ class InMemoryMemoryStore:
             self._memory_file = self._dir_path / "memory_state.json"
             if self._memory_file.exists():
                 self._state = self.load()
+        # Set mirror of abstracts for O(1) duplicate checks in add()
+        self._seen: Set[str] = set(self._state.abstracts)
 
     def load(self) -> MemoryState:
         if self._dir_path and self._memory_file.exists():
@@ -41,16 +43,20 @@ class InMemoryMemoryStore:
 
     def save(self, state: MemoryState) -> None:
         self._state = state
+        self._seen = set(state.abstracts)
+        self._write()
+
+    def _write(self) -> None:
         if self._dir_path:
             self._dir_path.mkdir(parents=True, exist_ok=True)
             try:
                 with open(self._memory_file, 'w', encoding='utf-8') as f:
-                    json.dump(state.model_dump(), f, ensure_ascii=False, indent=2)
+                    json.dump(self._state.model_dump(), f, ensure_ascii=False, indent=2)
             except Exception as e:
                 print(f"Warning: Failed to save memory state to {self._memory_file}: {e}")
 
     def add(self, abstract: str) -> None:
-        if abstract and abstract not in self._state.abstracts:
+        if abstract and abstract not in self._seen:
+            self._seen.add(abstract)
             self._state.abstracts.append(abstract)
-            if self._dir_path:
-                self.save(self._state)
+            self._write()
@@ -8,17 +8,26 @@ tracking and configurable cleanup.
 """
 
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 from pydantic import BaseModel, Field
-from datetime import datetime, timedelta, timezone
+from array import array
 import json
+import time
 from pathlib import Path
 
+from ._ttl_io import TimestampColumn, dumps, gather, iso_to_epoch, loads, write_lines_atomic
+
+
+def _entry_line(content: str, ts: float) -> bytes:
+    """Serialized NDJSON line for one entry (same shape as TTLMemoryEntry)"""
+    return dumps({'content': content, 'timestamp_ts': ts}) + b"\n"
+
 
 class TTLMemoryEntry(BaseModel):
     """Memory entry with timestamp for TTL tracking"""
     content: str = Field(..., description="Abstract content")
-    timestamp: str = Field(..., description="ISO format timestamp")
+    timestamp_ts: float = Field(..., description="POSIX epoch seconds (UTC)")
+    timestamp: Optional[str] = Field(default=None, description="Legacy ISO format timestamp")
 
 
 class TTLMemoryState(BaseModel):
@@ -92,65 +101,145 @@ class TTLMemoryStore:
         else:
             self._ttl_seconds = None  # TTL disabled
         
-        # Initialize state
-        self._state = TTLMemoryState()
+        # Entries are held column-wise (struct of arrays) rather than as a list
+        # of TTLMemoryEntry models: abstracts, their epoch timestamps (a
+        # TimestampColumn) and each entry's serialized log line (None until
+        # first needed; entries are never mutated, so it is computed once)
+        self._contents: List[str] = []
+        self._ts = TimestampColumn(self._ttl_seconds)
+        self._lines: List[Optional[bytes]] = []
+        # Contents of the current entries, for O(1) duplicate checks in add()
+        self._seen: Set[str] = set()
         
         if self._dir_path:
+            # Entries are logged one per line; ttl_memory_state.json is the
+            # format of older versions and only read when there is no log yet
+            self._log_file = self._dir_path / "ttl_memory_state.ndjson"
             self._memory_file = self._dir_path / "ttl_memory_state.json"
-            if self._memory_file.exists():
-                self._state = self._load_from_disk()
-                if self._enable_auto_cleanup and self._ttl_seconds is not None:
+            if not self._log_file.exists() and self._memory_file.exists():
+                self._set_entries(self._load_legacy_json().entries)
+                self._compact_to_disk()
+            if self._log_file.exists():
+                self._load_from_disk()
+                self._seen = set(self._contents)
+                if self._ttl_seconds is not None and self._enable_auto_cleanup:
                     self.cleanup_expired()
     
-    def _load_from_disk(self) -> TTLMemoryState:
-        """Load state from disk, handling both new and legacy formats"""
+    @staticmethod
+    def _entry_from_dict(item: Dict[str, Any], now: float) -> TTLMemoryEntry:
+        """Build an entry, converting an ISO-only timestamp to epoch seconds once."""
+        if item.get('timestamp_ts') is None:
+            item = dict(item)
+            iso = item.get('timestamp')
+            if iso is not None and not isinstance(iso, str):
+                raise TypeError(f"timestamp must be an ISO string, got {type(iso).__name__}")
+            item['timestamp_ts'] = iso_to_epoch(iso) if iso else now
+        return TTLMemoryEntry(**item)
+    
+    def _load_from_disk(self) -> None:
+        """Load entries from the NDJSON log, streaming one entry per line into the columns"""
+        now = time.time()
+        contents, ts, lines = [], array('d'), []
+        with open(self._log_file, 'rb') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = loads(line)
+                    if not isinstance(item, dict):
+                        raise TypeError(f"expected a JSON object, got {type(item).__name__}")
+                    content, timestamp = item.get('content'), item.get('timestamp_ts')
+                    if type(content) is str and type(timestamp) is float:
+                        # Line written by this store: trusted, skip validation and
+                        # reuse the line as read
+                        lines.append(line if line.endswith(b"\n") else line + b"\n")
+                    else:
+                        entry = self._entry_from_dict(item, now)
+                        content, timestamp = entry.content, entry.timestamp_ts
+                        lines.append(None)
+                    contents.append(content)
+                    ts.append(timestamp)
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    # e.g. a torn last line from an interrupted append
+                    print(f"Warning: Skipping bad line {line_no} in {self._log_file}: {e}")
+        self._contents, self._lines = contents, lines
+        self._ts.reset(ts)
+    
+    def _load_legacy_json(self) -> TTLMemoryState:
+        """Load state from the single-JSON file, handling both new and legacy formats"""
         try:
-            with open(self._memory_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(self._memory_file, 'rb') as f:
+                data = loads(f.read())
                 
+            now = time.time()
+            
             # Handle new format (with entries)
             if isinstance(data, dict) and 'entries' in data:
-                return TTLMemoryState(**data)
+                return TTLMemoryState(entries=[
+                    self._entry_from_dict(item, now) for item in data['entries']
+                ])
             
             # Handle legacy format (just abstracts list) - backward compatibility
             elif isinstance(data, dict) and 'abstracts' in data:
-                # Convert legacy format to TTL format (no timestamps = never expire)
+                # Convert legacy format to TTL format (stamped with load time)
                 entries = [
-                    TTLMemoryEntry(
-                        content=abstract,
-                        timestamp=datetime.now(timezone.utc).isoformat()
-                    )
+                    TTLMemoryEntry(content=abstract, timestamp_ts=now)
                     for abstract in data['abstracts']
                 ]
                 return TTLMemoryState(entries=entries)
             
             # Handle direct list format
             elif isinstance(data, list):
-                entries = [
-                    TTLMemoryEntry(
-                        content=item if isinstance(item, str) else item.get('content', ''),
-                        timestamp=item.get('timestamp', datetime.now(timezone.utc).isoformat()) 
-                        if isinstance(item, dict) else datetime.now(timezone.utc).isoformat()
-                    )
-                    for item in data
-                ]
+                entries = []
+                for item in data:
+                    if isinstance(item, dict):
+                        iso = item.get('timestamp')
+                        entries.append(TTLMemoryEntry(
+                            content=item.get('content', ''),
+                            timestamp_ts=item.get('timestamp_ts') or (iso_to_epoch(iso) if iso else now)
+                        ))
+                    else:
+                        entries.append(TTLMemoryEntry(content=item, timestamp_ts=now))
                 return TTLMemoryState(entries=entries)
             
             return TTLMemoryState()
             
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as e:
             print(f"Warning: Failed to load TTL memory state from {self._memory_file}: {e}")
             return TTLMemoryState()
     
-    def _save_to_disk(self) -> None:
-        """Save current state to disk"""
+    def _set_entries(self, entries: List[TTLMemoryEntry]) -> None:
+        """Replace the columns with the given entries."""
+        self._contents = [entry.content for entry in entries]
+        self._ts.reset(entry.timestamp_ts for entry in entries)
+        self._lines = [None] * len(entries)
+        self._seen = set(self._contents)
+    
+    def _line_at(self, i: int) -> bytes:
+        """Serialized log line of entry i (cached)"""
+        line = self._lines[i]
+        if line is None:
+            line = self._lines[i] = _entry_line(self._contents[i], self._ts[i])
+        return line
+    
+    def _append_to_disk(self, i: int) -> None:
+        """Append entry i to the log (O(1) in the number of stored entries)"""
+        if self._dir_path:
+            self._dir_path.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(self._log_file, 'ab') as f:
+                    f.write(self._line_at(i))
+            except Exception as e:
+                print(f"Warning: Failed to append TTL memory entry to {self._log_file}: {e}")
+    
+    def _compact_to_disk(self) -> None:
+        """Rewrite the log with exactly the current entries (atomically via tmp + rename)"""
         if self._dir_path:
             self._dir_path.mkdir(parents=True, exist_ok=True)
             try:
-                with open(self._memory_file, 'w', encoding='utf-8') as f:
-                    json.dump(self._state.model_dump(), f, ensure_ascii=False, indent=2)
+                write_lines_atomic(self._log_file, (self._line_at(i) for i in range(len(self._contents))))
             except Exception as e:
-                print(f"Warning: Failed to save TTL memory state to {self._memory_file}: {e}")
+                print(f"Warning: Failed to save TTL memory state to {self._log_file}: {e}")
     
     def add(self, abstract: str) -> None:
         """
@@ -163,19 +252,17 @@ class TTLMemoryStore:
             return
         
         # Check for duplicates
-        existing_contents = {entry.content for entry in self._state.entries}
-        if abstract in existing_contents:
+        if abstract in self._seen:
             return
+        self._seen.add(abstract)
         
         # Add with timestamp
-        entry = TTLMemoryEntry(
-            content=abstract,
-            timestamp=datetime.now(timezone.utc).isoformat()
-        )
-        self._state.entries.append(entry)
+        self._contents.append(abstract)
+        self._ts.append(time.time())
+        self._lines.append(None)
         
         if self._dir_path:
-            self._save_to_disk()
+            self._append_to_disk(len(self._contents) - 1)
     
     def load(self) -> Any:
         """
@@ -184,13 +271,13 @@ class TTLMemoryStore:
         Returns:
             MemoryState compatible object (has .abstracts attribute)
         """
-        # Auto-cleanup if enabled
-        if self._enable_auto_cleanup and self._ttl_seconds is not None:
+        # Auto-cleanup if enabled (only scans once the next deadline has passed)
+        if self._enable_auto_cleanup and self._ts.due():
             self.cleanup_expired()
         
         # Return compatible object
         from .memory import MemoryState
-        return MemoryState(abstracts=self._state.to_abstracts())
+        return MemoryState(abstracts=self._contents)
     
     def cleanup_expired(self) -> int:
         """
@@ -202,23 +289,19 @@ class TTLMemoryStore:
         if self._ttl_seconds is None:
             return 0  # TTL disabled
         
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(seconds=self._ttl_seconds)
+        cutoff = time.time() - self._ttl_seconds
         
-        original_count = len(self._state.entries)
-        
-        # Filter to keep only non-expired entries
-        self._state.entries = [
-            entry for entry in self._state.entries
-            if datetime.fromisoformat(entry.timestamp.replace('Z', '+00:00')) > cutoff
-        ]
-        
-        removed_count = original_count - len(self._state.entries)
+        keep, removed_count = self._ts.partition(cutoff)
+        if removed_count > 0:
+            self._contents = gather(self._contents, keep)
+            self._lines = gather(self._lines, keep)
+            self._ts.take(keep)
+            self._seen = set(self._contents)
         
         if removed_count > 0:
             print(f"TTLMemoryStore: Cleaned up {removed_count} expired entries")
             if self._dir_path:
-                self._save_to_disk()
+                self._compact_to_disk()
         
         return removed_count
     
@@ -229,7 +312,7 @@ class TTLMemoryStore:
         Returns:
             Dictionary with total, valid, expired counts
         """
-        total = len(self._state.entries)
+        total = len(self._contents)
         
         if self._ttl_seconds is None:
             return {
@@ -239,13 +322,19 @@ class TTLMemoryStore:
                 'ttl_enabled': False
             }
         
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(seconds=self._ttl_seconds)
+        if not self._ts.due():
+            # Nothing can have expired before the next deadline
+            return {
+                'total': total,
+                'valid': total,
+                'expired': 0,
+                'ttl_enabled': True,
+                'ttl_seconds': self._ttl_seconds
+            }
+        
+        cutoff = time.time() - self._ttl_seconds
         
-        expired_count = sum(
-            1 for entry in self._state.entries
-            if datetime.fromisoformat(entry.timestamp.replace('Z', '+00:00')) <= cutoff
-        )
+        _, expired_count = self._ts.partition(cutoff)
         
         return {
             'total': total,
@@ -262,14 +351,12 @@ class TTLMemoryStore:
         Args:
             state: MemoryState object with abstracts
         """
-        # Convert MemoryState to TTLMemoryState
-        self._state.entries = [
-            TTLMemoryEntry(
-                content=abstract,
-                timestamp=datetime.now(timezone.utc).isoformat()
-            )
-            for abstract in state.abstracts
-        ]
+        # Every abstract is stamped with the current time
+        now = time.time()
+        self._contents = list(state.abstracts)
+        self._ts.reset(array('d', [now]) * len(self._contents))
+        self._lines = [None] * len(self._contents)
+        self._seen = set(self._contents)
         
         if self._dir_path:
-            self._save_to_disk()
+            self._compact_to_disk()
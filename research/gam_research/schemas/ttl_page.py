@@ -8,13 +8,26 @@ tracking and configurable cleanup.
 """
 
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
-from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from array import array
+from datetime import datetime, timezone
 import json
+import math
+import time
 from pathlib import Path
 
+from ._ttl_io import TimestampColumn, dumps, gather, iso_to_epoch, loads, write_lines_atomic
 from .page import Page
 
+# Bound once: _stamp runs for every added or newly stamped page
+_UTC = timezone.utc
+_from_timestamp = datetime.fromtimestamp
+
+
+def _is_epoch(value: Any) -> bool:
+    """Whether a logged ttl_ts value is epoch seconds (a real number, not bool)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
 
 class TTLPageStore:
     """
@@ -80,60 +93,165 @@ class TTLPageStore:
         
         # Initialize pages list
         self._pages: List[Page] = []
+        # Epoch timestamps parallel to self._pages (inf for pages without a
+        # valid timestamp, which never expire)
+        self._ts = TimestampColumn(self._ttl_seconds)
         
         if self._dir_path:
+            # NDJSON log, plus the pre-NDJSON ttl_pages.json migrated on first open
+            self._log_file = self._dir_path / "ttl_pages.ndjson"
             self._pages_file = self._dir_path / "ttl_pages.json"
-            if self._pages_file.exists():
-                self._pages = self._load_from_disk()
-                if self._enable_auto_cleanup and self._ttl_seconds is not None:
-                    self.cleanup_expired()
+            if not self._log_file.exists() and self._pages_file.exists():
+                self._pages = self._load_legacy_json()
+                self._sync_ts()
+                self._compact_to_disk()
+            if self._log_file.exists():
+                auto_cleanup = self._ttl_seconds is not None and self._enable_auto_cleanup
+                cutoff = time.time() - self._ttl_seconds if auto_cleanup else None
+                self._pages, ts, dropped = self._load_from_disk(cutoff)
+                self._ts.reset(ts)
+                if auto_cleanup:
+                    # Pages skipped while reading are still in the log
+                    if dropped:
+                        print(f"TTLPageStore: Cleaned up {dropped} expired pages")
+                    if self.cleanup_expired() == 0 and dropped:
+                        self._compact_to_disk()
+    
+    @classmethod
+    def _page_from_dict(cls, page_data: Dict[str, Any]) -> Tuple[Page, float]:
+        """
+        Build a page and its epoch timestamp (inf if it has no valid timestamp).
+        
+        Pages without a timestamp are stamped with the load time. The epoch is
+        taken from the record's ttl_ts (written next to the page in the log)
+        when present, so the ISO string is only parsed for older records.
+        """
+        if not isinstance(page_data, dict) or not isinstance(page_data.get('meta', {}), dict):
+            raise TypeError("expected a JSON object with an object 'meta'")
+        ts = page_data.pop('ttl_ts', None)
+        
+        # Ensure meta dict exists
+        if 'meta' not in page_data:
+            page_data['meta'] = {}
+        
+        # Add timestamp if missing (backward compatibility)
+        meta = page_data['meta']
+        if 'timestamp' not in meta:
+            ts = time.time()
+            cls._stamp(meta, ts)
+        
+        if type(page_data.get('header')) is str and type(page_data.get('content')) is str and type(meta) is dict:
+            # Well-formed record: skip validation
+            page = Page.model_construct(**page_data)
+        else:
+            page = Page(**page_data)
+        return page, ts if _is_epoch(ts) else cls._page_ts(page)
+    
+    def _load_from_disk(self, cutoff: Optional[float] = None) -> Tuple[List[Page], array, int]:
+        """
+        Load pages from the NDJSON log, streaming one page per line.
+        
+        Args:
+            cutoff: If given, lines whose epoch timestamp is at or before it are
+                skipped without building a Page
+        
+        Returns:
+            The loaded pages, their timestamp column and the number of expired
+            lines skipped
+        """
+        pages, ts_column, dropped = [], array('d'), 0
+        with open(self._log_file, 'rb') as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    page_data = loads(line)
+                    if cutoff is not None and type(page_data) is dict:
+                        ts = page_data.get('ttl_ts')
+                        if type(ts) is float and ts <= cutoff:
+                            dropped += 1
+                            continue
+                    page, ts = self._page_from_dict(page_data)
+                    pages.append(page)
+                    ts_column.append(ts)
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    # e.g. a torn last line from an interrupted append
+                    print(f"Warning: Skipping bad line {line_no} in {self._log_file}: {e}")
+        return pages, ts_column, dropped
     
-    def _load_from_disk(self) -> List[Page]:
-        """Load pages from disk"""
+    def _load_legacy_json(self) -> List[Page]:
+        """Load pages from the single-JSON file written by older versions"""
         try:
-            with open(self._pages_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(self._pages_file, 'rb') as f:
+                data = loads(f.read())
                 
             if isinstance(data, list):
-                pages = []
-                for page_data in data:
-                    # Ensure meta dict exists
-                    if 'meta' not in page_data:
-                        page_data['meta'] = {}
-                    
-                    # Add timestamp if missing (backward compatibility)
-                    if 'timestamp' not in page_data['meta']:
-                        page_data['meta']['timestamp'] = datetime.now(timezone.utc).isoformat()
-                    
-                    pages.append(Page(**page_data))
-                return pages
+                return [self._page_from_dict(page_data)[0] for page_data in data]
             elif isinstance(data, dict) and 'pages' in data:
                 # Handle wrapped format
-                pages = []
-                for page_data in data['pages']:
-                    if 'meta' not in page_data:
-                        page_data['meta'] = {}
-                    if 'timestamp' not in page_data['meta']:
-                        page_data['meta']['timestamp'] = datetime.now(timezone.utc).isoformat()
-                    pages.append(Page(**page_data))
-                return pages
+                return [self._page_from_dict(page_data)[0] for page_data in data['pages']]
             
             return []
             
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
             print(f"Warning: Failed to load TTL pages from {self._pages_file}: {e}")
             return []
     
-    def _save_to_disk(self) -> None:
-        """Save pages to disk"""
+    @staticmethod
+    def _stamp(meta: Dict[str, Any], ts: float) -> None:
+        """Record the timestamp in meta as an ISO string (the only key the store writes)."""
+        meta['timestamp'] = _from_timestamp(ts, _UTC).isoformat()
+    
+    @staticmethod
+    def _page_ts(page: Page) -> float:
+        """Epoch seconds of the page's ISO meta['timestamp']; inf if missing or invalid (never expires)."""
+        timestamp_str = page.meta.get('timestamp') if page.meta else None
+        if not timestamp_str:
+            return math.inf
+        try:
+            return iso_to_epoch(timestamp_str)
+        except (ValueError, AttributeError):
+            return math.inf
+    
+    def _sync_ts(self) -> None:
+        """Rebuild the timestamp column from the pages."""
+        self._ts.reset(map(self._page_ts, self._pages))
+    
+    def _timed_column(self) -> TimestampColumn:
+        """The timestamp column, resynced first if the page list was changed directly."""
+        if len(self._ts) != len(self._pages):
+            # e.g. pages appended to the list returned by load()
+            self._sync_ts()
+        return self._ts
+    
+    @staticmethod
+    def _page_line(page: Page, ts: float) -> bytes:
+        data = page.model_dump()
+        if math.isfinite(ts):
+            # Epoch seconds next to (not inside) the caller-owned meta, so loading
+            # doesn't have to parse the ISO string again
+            data['ttl_ts'] = ts
+        return dumps(data) + b"\n"
+    
+    def _append_to_disk(self, page: Page, ts: float) -> None:
+        """Append a single page to the log (O(1) in the number of stored pages)"""
+        if self._dir_path:
+            self._dir_path.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(self._log_file, 'ab') as f:
+                    f.write(self._page_line(page, ts))
+            except Exception as e:
+                print(f"Warning: Failed to append TTL page to {self._log_file}: {e}")
+    
+    def _compact_to_disk(self) -> None:
+        """Rewrite the log with exactly the current pages (atomically via tmp + rename)"""
         if self._dir_path:
             self._dir_path.mkdir(parents=True, exist_ok=True)
             try:
-                pages_data = [page.model_dump() for page in self._pages]
-                with open(self._pages_file, 'w', encoding='utf-8') as f:
-                    json.dump(pages_data, f, ensure_ascii=False, indent=2)
+                lines = map(self._page_line, self._pages, self._timed_column().view().tolist())
+                write_lines_atomic(self._log_file, lines)
             except Exception as e:
-                print(f"Warning: Failed to save TTL pages to {self._pages_file}: {e}")
+                print(f"Warning: Failed to save TTL pages to {self._log_file}: {e}")
     
     def add(self, page: Page) -> None:
         """
@@ -147,12 +265,14 @@ class TTLPageStore:
             page.meta = {}
         
         # Add timestamp
-        page.meta['timestamp'] = datetime.now(timezone.utc).isoformat()
+        now = time.time()
+        self._stamp(page.meta, now)
         
+        self._timed_column().append(now)
         self._pages.append(page)
         
         if self._dir_path:
-            self._save_to_disk()
+            self._append_to_disk(page, now)
     
     def load(self) -> List[Page]:
         """
@@ -161,8 +281,8 @@ class TTLPageStore:
         Returns:
             List of valid (non-expired) pages
         """
-        # Auto-cleanup if enabled
-        if self._enable_auto_cleanup and self._ttl_seconds is not None:
+        # Auto-cleanup if enabled (only scans once the next deadline has passed)
+        if self._enable_auto_cleanup and self._timed_column().due():
             self.cleanup_expired()
         
         return self._pages
@@ -177,36 +297,17 @@ class TTLPageStore:
         if self._ttl_seconds is None:
             return 0  # TTL disabled
         
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(seconds=self._ttl_seconds)
+        cutoff = time.time() - self._ttl_seconds
         
-        original_count = len(self._pages)
-        
-        # Filter to keep only non-expired pages
-        valid_pages = []
-        for page in self._pages:
-            # Get timestamp from meta
-            timestamp_str = page.meta.get('timestamp') if page.meta else None
-            
-            if timestamp_str:
-                try:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                    if timestamp > cutoff:
-                        valid_pages.append(page)
-                except (ValueError, AttributeError):
-                    # Invalid timestamp, keep page (backward compat)
-                    valid_pages.append(page)
-            else:
-                # No timestamp, keep page (backward compat)
-                valid_pages.append(page)
-        
-        self._pages = valid_pages
-        removed_count = original_count - len(self._pages)
+        keep, removed_count = self._timed_column().partition(cutoff)
+        if removed_count > 0:
+            self._pages = gather(self._pages, keep)
+            self._ts.take(keep)
         
         if removed_count > 0:
             print(f"TTLPageStore: Cleaned up {removed_count} expired pages")
             if self._dir_path:
-                self._save_to_disk()
+                self._compact_to_disk()
         
         return removed_count
     
@@ -227,19 +328,10 @@ class TTLPageStore:
                 'ttl_enabled': False
             }
         
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(seconds=self._ttl_seconds)
-        
         expired_count = 0
-        for page in self._pages:
-            timestamp_str = page.meta.get('timestamp') if page.meta else None
-            if timestamp_str:
-                try:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                    if timestamp <= cutoff:
-                        expired_count += 1
-                except (ValueError, AttributeError):
-                    pass
+        if self._timed_column().due():
+            cutoff = time.time() - self._ttl_seconds
+            _, expired_count = self._ts.partition(cutoff)
         
         return {
             'total': total,
@@ -261,12 +353,13 @@ class TTLPageStore:
             if page.meta is None:
                 page.meta = {}
             if 'timestamp' not in page.meta:
-                page.meta['timestamp'] = datetime.now(timezone.utc).isoformat()
+                self._stamp(page.meta, time.time())
         
         self._pages = pages
+        self._sync_ts()
         
         if self._dir_path:
-            self._save_to_disk()
+            self._compact_to_disk()
     
     def get(self, index: int) -> Optional[Page]:
         """
@@ -281,3 +374,14 @@ class TTLPageStore:
         if 0 <= index < len(self._pages):
             return self._pages[index]
         return None
+    
+    def __len__(self) -> int:
+        return len(self._pages)
+    
+    def __getitem__(self, index: int) -> Page:
+        """Plain list indexing (negative indices allowed, IndexError when out of range); no expiry check"""
+        return self._pages[index]
+    
+    def __iter__(self) -> Iterator[Page]:
+        """Iterate over the current pages without the auto-cleanup check done by load()"""
+        return iter(self._pages)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit Tests for the DenseRetriever embedding cache
+
+Tests that only new or changed texts are encoded, that the cache key covers
+the encoding parameters, and that cache shards are compacted and pruned.
+The encoder is replaced by a deterministic stub, so no model is loaded.
+"""
+
+import pytest
+import tempfile
+import shutil
+import os
+import sys
+import types
+import zlib
+
+import numpy as np
+
+pytest.importorskip("faiss")
+
+from gam_research.schemas.page import InMemoryPageStore, Page
+
+
+@pytest.fixture
+def dense_retriever_cls(monkeypatch):
+    """DenseRetriever class, importable without FlagEmbedding installed"""
+    try:
+        import FlagEmbedding  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("FlagEmbedding")
+        stub.FlagAutoModel = None
+        monkeypatch.setitem(sys.modules, "FlagEmbedding", stub)
+    from gam_research.retriever.dense_retriever import DenseRetriever
+    return DenseRetriever
+
+
+def _page_store(contents):
+    store = InMemoryPageStore()
+    for content in contents:
+        store.add(Page(header="h", content=content))
+    return store
+
+
+class TestDenseEmbCache:
+    """Unit tests for DenseRetriever's on-disk embedding cache"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, dense_retriever_cls):
+        """Create temporary index directory and an encode-call log for each test"""
+        self.tmpdir = tempfile.mkdtemp(prefix='dense_emb_cache_test_')
+        self.cls = dense_retriever_cls
+        self.encoded = []
+        yield
+        if os.path.exists(self.tmpdir):
+            shutil.rmtree(self.tmpdir)
+
+    def _retriever(self, **config):
+        """API-mode retriever (no local model) with a stub encoder"""
+        # Nothing listens on the discard port: the health check only warns
+        retriever = self.cls({"index_dir": self.tmpdir, "api_url": "http://127.0.0.1:9", **config})
+
+        def encode(texts):
+            self.encoded.extend(texts)
+            return np.stack([
+                np.random.default_rng(zlib.crc32(t.encode())).random(8, dtype=np.float32)
+                for t in texts
+            ])
+        retriever._encode_texts = encode
+        return retriever
+
+    def _parts(self):
+        return sorted(os.listdir(os.path.join(self.tmpdir, "emb_cache")))
+
+    def test_only_new_texts_encoded(self):
+        """Test that rebuilds and updates only encode texts missing from the cache"""
+        contents = [f"c{i}" for i in range(10)]
+        self._retriever().build(_page_store(contents))
+        assert self.encoded == contents
+        assert self._parts() == ["part_000001.npz"]
+
+        # A fresh retriever on the same index_dir finds everything cached
+        self.encoded.clear()
+        retriever = self._retriever()
+        retriever.build(_page_store(contents))
+        assert self.encoded == []
+
+        # Appended pages: only those are encoded, into one new shard
+        retriever.update(_page_store(contents + ["c10", "c11"]))
+        assert self.encoded == ["c10", "c11"]
+        assert self._parts() == ["part_000002.npz", "part_000003.npz"]
+
+        # A changed page is re-encoded on its own
+        self.encoded.clear()
+        changed = contents + ["c10", "c11"]
+        changed[4] = "c4 edited"
+        retriever.update(_page_store(changed))
+        assert self.encoded == ["c4 edited"]
+        assert np.array_equal(retriever.doc_emb[4], retriever._encode_texts(["c4 edited"])[0])
+
+    def test_encoding_params_in_key(self):
+        """Test that changing an encoding parameter misses the cache"""
+        contents = ["a", "b", "c"]
+        self._retriever().build(_page_store(contents))
+
+        self.encoded.clear()
+        self._retriever(max_length=256).build(_page_store(contents))
+        assert self.encoded == contents
+
+        self.encoded.clear()
+        self._retriever(max_length=256, pooling_method="mean").build(_page_store(contents))
+        assert self.encoded == contents
+
+        # Same parameters again: everything hits
+        self.encoded.clear()
+        self._retriever(max_length=256, pooling_method="mean").build(_page_store(contents))
+        assert self.encoded == []
+
+    def test_build_collapses_and_prunes(self):
+        """Test that build() leaves one shard holding exactly the current corpus"""
+        retriever = self._retriever()
+        retriever.build(_page_store(["a", "b"]))
+        retriever.update(_page_store(["a", "b", "c"]))
+        retriever.update(_page_store(["a", "b", "c", "d"]))
+        assert len(self._parts()) == 3
+
+        retriever.build(_page_store(["c", "d", "d"]))
+        parts = self._parts()
+        assert len(parts) == 1
+        with np.load(os.path.join(self.tmpdir, "emb_cache", parts[0])) as data:
+            assert len(data["keys"]) == 2
+
+        # Pruned texts are encoded again
+        self.encoded.clear()
+        self._retriever().build(_page_store(["a", "c"]))
+        assert self.encoded == ["a"]
+
+    def test_update_compacts_at_max_parts(self):
+        """Test that update() merges shards once there are more than emb_cache_max_parts"""
+        retriever = self._retriever(emb_cache_max_parts=2)
+        contents = ["p0"]
+        retriever.build(_page_store(contents))
+
+        contents.append("p1")
+        retriever.update(_page_store(contents))
+        assert len(self._parts()) == 2
+
+        contents.append("p2")
+        retriever.update(_page_store(contents))
+        assert len(self._parts()) == 1
+
+        self.encoded.clear()
+        self._retriever().build(_page_store(contents))
+        assert self.encoded == []
+
+
+def run_tests():
+    """Run all tests"""
+    pytest.main([__file__, '-v', '--tb=short'])
+
+
+if __name__ == '__main__':
+    run_tests()
@@ -128,10 +128,10 @@ def simulate_after_ttl():
         print(f"   TTL Enabled: {mem_stats['ttl_enabled']}")
         print(f"   TTL Period: {mem_stats['ttl_seconds'] / 86400:.0f} days")
         
-        if os.path.exists(tmpdir + '/ttl_memory_state.json'):
-            print(f"   Memory File Size: {os.path.getsize(tmpdir + '/ttl_memory_state.json') / 1024:.2f} KB")
-        if os.path.exists(tmpdir + '/ttl_pages.json'):
-            print(f"   Pages File Size: {os.path.getsize(tmpdir + '/ttl_pages.json') / 1024:.2f} KB")
+        if os.path.exists(tmpdir + '/ttl_memory_state.ndjson'):
+            print(f"   Memory File Size: {os.path.getsize(tmpdir + '/ttl_memory_state.ndjson') / 1024:.2f} KB")
+        if os.path.exists(tmpdir + '/ttl_pages.ndjson'):
+            print(f"   Pages File Size: {os.path.getsize(tmpdir + '/ttl_pages.ndjson') / 1024:.2f} KB")
         
         print(f"\n✅ IMPROVEMENTS:")
         print(f"   ✓ Automatic expiration after {mem_stats['ttl_seconds'] / 86400:.0f} days")
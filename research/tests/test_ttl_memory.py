@@ -179,6 +179,22 @@ class TestTTLMemoryStore:
         # Should be empty after auto-cleanup
         assert len(state.abstracts) == 0
     
+    def test_clock_step_back_lowers_deadline(self, monkeypatch):
+        """Test that an entry added after a backwards clock step expires on time"""
+        clock = [1_000_000.0]
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        store = TTLMemoryStore(ttl_seconds=100, enable_auto_cleanup=False)
+
+        store.add("Later entry")
+        clock[0] -= 50  # clock steps backwards
+        store.add("Earlier entry")
+
+        # Earlier entry has expired, later one has not
+        clock[0] += 120
+        stats = store.get_stats()
+        assert stats['expired'] == 1
+        assert stats['valid'] == 1
+
     def test_persistence_across_sessions(self):
         """Test that data persists across sessions"""
         # Session 1: Create and add
@@ -219,7 +235,134 @@ class TestTTLMemoryStore:
         assert len(state.abstracts) == 2
         assert "Legacy abstract 1" in state.abstracts
         assert "Legacy abstract 2" in state.abstracts
-    
+
+    def test_backward_compatibility_iso_timestamps(self):
+        """Test loading entries that only carry ISO format timestamps"""
+        legacy_file = os.path.join(self.tmpdir, "ttl_memory_state.json")
+        os.makedirs(self.tmpdir, exist_ok=True)
+
+        import json
+        now = datetime.now(timezone.utc)
+        legacy_data = {
+            "entries": [
+                {"content": "Old ISO entry", "timestamp": (now - timedelta(days=40)).isoformat()},
+                {"content": "Recent ISO entry", "timestamp": now.isoformat().replace('+00:00', 'Z')}
+            ]
+        }
+
+        with open(legacy_file, 'w') as f:
+            json.dump(legacy_data, f)
+
+        store = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30)
+        state = store.load()
+
+        # Old entry expired on load, recent one kept with converted timestamp
+        assert state.abstracts == ["Recent ISO entry"]
+        assert abs(store._ts[0] - now.timestamp()) < 1
+
+    def test_malformed_log_lines_skipped(self):
+        """Test that valid JSON lines of the wrong shape are skipped, not fatal"""
+        store = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30)
+        store.add("Good entry")
+
+        log_file = os.path.join(self.tmpdir, "ttl_memory_state.ndjson")
+        with open(log_file, 'a') as f:
+            f.write('["x"]\n')
+            f.write('null\n')
+            f.write('{"content": "x", "timestamp": 5}\n')
+            f.write('{"content": "y", "timestamp": "not a date"}\n')
+
+        state = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert state.abstracts == ["Good entry"]
+
+    def _write_log(self, items):
+        """Seed the NDJSON log with (content, epoch seconds) pairs"""
+        import json
+        os.makedirs(self.tmpdir, exist_ok=True)
+        log_file = os.path.join(self.tmpdir, "ttl_memory_state.ndjson")
+        with open(log_file, 'w') as f:
+            for content, ts in items:
+                f.write(json.dumps({"content": content, "timestamp_ts": ts}) + "\n")
+        return log_file
+
+    def test_unsorted_log_cleanup(self):
+        """Test expiry when the log is not in timestamp order"""
+        now = time.time()
+        day = 86400.0
+        self._write_log([
+            ("Recent 1", now - 1 * day),
+            ("Old 1", now - 40 * day),
+            ("Recent 2", now - 2 * day),
+            ("Old 2", now - 35 * day),
+            ("Recent 3", now - 3 * day),
+        ])
+
+        store = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30, enable_auto_cleanup=False)
+        assert store._ts.sorted is False
+        stats = store.get_stats()
+        assert stats['expired'] == 2
+        assert stats['valid'] == 3
+
+        assert store.cleanup_expired() == 2
+        assert store.load().abstracts == ["Recent 1", "Recent 2", "Recent 3"]
+        # Survivors are newest-first, so the column is still unsorted
+        assert store._ts.sorted is False
+
+        # Reopened from the compacted log
+        state = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert state.abstracts == ["Recent 1", "Recent 2", "Recent 3"]
+
+    def test_unsorted_cleanup_restores_sorted(self):
+        """Test that sortedness is re-checked after removing out-of-order entries"""
+        now = time.time()
+        day = 86400.0
+        self._write_log([
+            ("Recent 1", now - 3 * day),
+            ("Old", now - 40 * day),
+            ("Recent 2", now - 1 * day),
+        ])
+
+        store = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30, enable_auto_cleanup=False)
+        assert store._ts.sorted is False
+        assert store.cleanup_expired() == 1
+        assert store._ts.sorted is True
+
+    def test_auto_cleanup_on_open_mixed_order(self):
+        """Test that opening a store with auto-cleanup drops expired entries and compacts the log"""
+        now = time.time()
+        day = 86400.0
+        log_file = self._write_log([
+            ("Recent", now - 1 * day),
+            ("Old", now - 40 * day),
+        ])
+
+        store = TTLMemoryStore(dir_path=self.tmpdir, ttl_days=30)
+        assert store.load().abstracts == ["Recent"]
+        with open(log_file) as f:
+            assert len(f.read().splitlines()) == 1
+
+    def test_expiry_deadline_gates_scans(self, monkeypatch):
+        """Test that stats and load() report nothing expired until the deadline, then clean up"""
+        clock = [1_000_000.0]
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        store = TTLMemoryStore(ttl_seconds=100)
+
+        store.add("First")
+        clock[0] += 50
+        store.add("Second")
+
+        clock[0] += 49  # First expires at +100
+        assert store.get_stats()['expired'] == 0
+        assert store.load().abstracts == ["First", "Second"]
+
+        clock[0] += 1
+        assert store.get_stats()['expired'] == 1
+        assert store.load().abstracts == ["Second"]
+
+        clock[0] += 50
+        assert store.load().abstracts == []
+        assert store.get_stats()['total'] == 0
+
     def test_in_memory_only_mode(self):
         """Test in-memory only mode (no persistence)"""
         store = TTLMemoryStore(ttl_days=30)  # No dir_path
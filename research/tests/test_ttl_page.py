@@ -12,7 +12,7 @@ import tempfile
 import shutil
 import os
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from gam_research.schemas.ttl_page import TTLPageStore
 from gam_research.schemas.page import Page
@@ -63,6 +63,22 @@ class TestTTLPageStore:
         timestamp_str = pages[0].meta['timestamp']
         datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))  # Should not raise
     
+    def test_caller_meta_ts_untouched(self):
+        """Test that a caller's meta['ts'] is neither used for TTL nor overwritten"""
+        iso = datetime.now(timezone.utc).isoformat()
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30)
+        store.save([
+            Page(header="Numeric", content="C1", meta={"timestamp": iso, "ts": 12.5}),
+            Page(header="Text", content="C2", meta={"timestamp": iso, "ts": "00:01:02"}),
+        ])
+        store.add(Page(header="Added", content="C3", meta={"ts": 42}))
+
+        # 12.5 is not read as a 1970 epoch: nothing has expired
+        assert store.cleanup_expired() == 0
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.meta['ts'] for p in pages] == [12.5, "00:01:02", 42]
+        assert all(set(p.meta) == {"timestamp", "ts"} for p in pages)
+
     def test_stats_calculation(self):
         """Test statistics calculation"""
         store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30)
@@ -149,7 +165,40 @@ class TestTTLPageStore:
         # Test invalid indices
         assert store.get(-1) is None
         assert store.get(10) is None
+
+        # Sequence protocol
+        assert len(store) == 3
+        assert store[-1].header == "H3"
+        assert [p.header for p in store] == ["H1", "H2", "H3"]
+        with pytest.raises(IndexError):
+            store[10]
     
+    def test_clock_step_back_lowers_deadline(self, monkeypatch):
+        """Test that a page added after a backwards clock step expires on time"""
+        clock = [1_000_000.0]
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        store = TTLPageStore(ttl_seconds=100)
+
+        store.save([Page(header="Later", content="C1")])
+        clock[0] -= 1  # clock steps backwards
+        store.add(Page(header="Earlier", content="C2"))
+
+        # Earlier page has expired, later one has not
+        clock[0] += 100
+        assert store.get_stats()['expired'] == 1
+        assert [p.header for p in store.load()] == ["Later"]
+
+    def test_pages_appended_to_loaded_list_expire(self):
+        """Test that pages appended to the list from load() are timed and cleaned up"""
+        store = TTLPageStore(ttl_days=30)
+        old = (datetime.now(timezone.utc) - timedelta(days=40)).isoformat()
+        store.load().append(Page(header="Old", content="C1", meta={"timestamp": old}))
+
+        stats = store.get_stats()
+        assert stats['total'] == 1
+        assert stats['expired'] == 1
+        assert store.load() == []
+
     def test_persistence_across_sessions(self):
         """Test that pages persist across sessions"""
         # Session 1
@@ -162,7 +211,55 @@ class TestTTLPageStore:
         
         assert len(pages) == 1
         assert pages[0].header == "Persistent"
-    
+
+    def test_add_appends_one_line(self):
+        """Test that add() appends to the NDJSON log instead of rewriting it"""
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30)
+        store.add(Page(header="H1", content="C1"))
+        store.add(Page(header="H2", content="C2"))
+
+        log_file = os.path.join(self.tmpdir, "ttl_pages.ndjson")
+        with open(log_file) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 2
+
+        # A torn trailing line is skipped instead of failing the whole load
+        with open(log_file, 'a') as f:
+            f.write('{"header": "Torn')
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.header for p in pages] == ["H1", "H2"]
+
+    def test_meta_values_beyond_plain_json(self):
+        """Test that meta values stdlib json accepts are persisted whichever encoder is used"""
+        import numpy as np
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30)
+        store.add(Page(header="Numpy", content="C1", meta={"score": np.float64(0.5)}))
+        store.add(Page(header="IntKeys", content="C2", meta={"by_id": {1: "a"}}))
+
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.header for p in pages] == ["Numpy", "IntKeys"]
+        assert pages[0].meta["score"] == 0.5
+        assert pages[1].meta["by_id"] == {"1": "a"}
+
+        # Compaction rewrites the same pages
+        store.save(store.load())
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.header for p in pages] == ["Numpy", "IntKeys"]
+
+    def test_malformed_log_lines_skipped(self):
+        """Test that valid JSON lines of the wrong shape are skipped, not fatal"""
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30)
+        store.add(Page(header="H1", content="C1"))
+
+        log_file = os.path.join(self.tmpdir, "ttl_pages.ndjson")
+        with open(log_file, 'a') as f:
+            f.write('["x"]\n')
+            f.write('null\n')
+            f.write('{"header": "H2", "content": "C2", "meta": "oops"}\n')
+
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.header for p in pages] == ["H1"]
+
     def test_backward_compatibility_without_timestamp(self):
         """Test loading pages without timestamps (legacy format)"""
         # Manually create legacy format file
@@ -189,7 +286,95 @@ class TestTTLPageStore:
         assert len(pages) == 1
         assert pages[0].header == "Legacy header"
         assert 'timestamp' in pages[0].meta  # Timestamp added automatically
-    
+
+        # Legacy file is migrated into the NDJSON log
+        assert os.path.exists(os.path.join(self.tmpdir, "ttl_pages.ndjson"))
+        store.add(Page(header="New header", content="New content"))
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.header for p in pages] == ["Legacy header", "New header"]
+
+    def test_save_out_of_order_and_unparseable_timestamps(self):
+        """Test save() with mixed-order and invalid ISO timestamps"""
+        now = datetime.now(timezone.utc)
+        pages = [
+            Page(header="Recent1", content="C1", meta={"timestamp": (now - timedelta(days=2)).isoformat()}),
+            Page(header="Old1", content="C2", meta={"timestamp": (now - timedelta(days=40)).isoformat()}),
+            Page(header="Bad", content="C3", meta={"timestamp": "not a date"}),
+            Page(header="Recent2", content="C4", meta={"timestamp": (now - timedelta(days=1)).isoformat().replace('+00:00', 'Z')}),
+            Page(header="Old2", content="C5", meta={"timestamp": (now - timedelta(days=31)).isoformat()}),
+        ]
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30, enable_auto_cleanup=False)
+        store.save(pages)
+        assert store._ts.sorted is False
+
+        stats = store.get_stats()
+        assert stats['expired'] == 2
+        assert stats['valid'] == 3
+
+        # Unparseable timestamps never expire
+        assert store.cleanup_expired() == 2
+        assert [p.header for p in store.load()] == ["Recent1", "Bad", "Recent2"]
+        # "Bad" sorts as +inf, so the survivors are still out of order
+        assert store._ts.sorted is False
+
+        pages = TTLPageStore(dir_path=self.tmpdir, ttl_days=30).load()
+        assert [p.header for p in pages] == ["Recent1", "Bad", "Recent2"]
+
+    def test_unsorted_cleanup_restores_sorted(self):
+        """Test that sortedness is re-checked after removing out-of-order pages"""
+        now = time.time()
+        day = 86400.0
+        meta = lambda ts: {"timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat()}
+        store = TTLPageStore(ttl_days=30, enable_auto_cleanup=False)
+        store.save([
+            Page(header="Recent1", content="C1", meta=meta(now - 3 * day)),
+            Page(header="Old", content="C2", meta=meta(now - 40 * day)),
+            Page(header="Recent2", content="C3", meta=meta(now - 1 * day)),
+        ])
+        assert store._ts.sorted is False
+        assert store.cleanup_expired() == 1
+        assert store._ts.sorted is True
+        assert [p.header for p in store.load()] == ["Recent1", "Recent2"]
+
+    def test_open_skips_expired_lines_and_compacts(self):
+        """Test that expired log lines are dropped while loading and the log is compacted"""
+        import json
+        now = time.time()
+        day = 86400.0
+        os.makedirs(self.tmpdir, exist_ok=True)
+        log_file = os.path.join(self.tmpdir, "ttl_pages.ndjson")
+        with open(log_file, 'w') as f:
+            for header, ts in [("Recent1", now - 1 * day), ("Old", now - 40 * day), ("Recent2", now - 2 * day)]:
+                iso = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+                f.write(json.dumps({"header": header, "content": "C", "meta": {"timestamp": iso}, "ttl_ts": ts}) + "\n")
+
+        # Without auto-cleanup the expired page is loaded
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30, enable_auto_cleanup=False)
+        assert len(store.load()) == 3
+
+        store = TTLPageStore(dir_path=self.tmpdir, ttl_days=30)
+        assert [p.header for p in store.load()] == ["Recent1", "Recent2"]
+        with open(log_file) as f:
+            assert len(f.read().splitlines()) == 2
+
+    def test_expiry_deadline_gates_scans(self, monkeypatch):
+        """Test that stats and load() report nothing expired until the deadline, then clean up"""
+        clock = [1_000_000.0]
+        monkeypatch.setattr(time, 'time', lambda: clock[0])
+        store = TTLPageStore(ttl_seconds=100)
+
+        store.add(Page(header="First", content="C1"))
+        clock[0] += 50
+        store.add(Page(header="Second", content="C2"))
+
+        clock[0] += 49  # First expires at +100
+        assert store.get_stats()['expired'] == 0
+        assert len(store.load()) == 2
+
+        clock[0] += 1
+        assert store.get_stats()['expired'] == 1
+        assert [p.header for p in store.load()] == ["Second"]
+
     def test_mixed_expired_and_valid(self):
         """Test handling mix of expired and valid pages"""
         store = TTLPageStore(
@@ -6,15 +6,17 @@ Long Horizontal API routes – agent loop with GAM memory visualization.
 from __future__ import annotations
 
 import json
+import math
 import os
 import threading
+from collections import Counter
 from pathlib import Path
 from queue import Queue
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
+import numpy as np
 import openai
 from flask import Blueprint, Response, current_app, jsonify, request
-from rank_bm25 import BM25Okapi
 
 from ..helpers import read_uploaded_files, get_timestamp_dir, DEFAULT_OUTPUT_BASE
 
@@ -42,38 +44,98 @@ long_horizontal_bp = Blueprint("long_horizontal", __name__)
 _sessions: Dict[str, dict] = {}
 
 
+class _PostingsBM25:
+    """
+    Okapi BM25 over an inverted index ``{token: (doc_ids, term_freqs)}``.
+
+    Scores match ``rank_bm25.BM25Okapi`` (same k1/b defaults and epsilon floor
+    for negative idf), but a query only touches documents that contain at
+    least one of its tokens instead of scanning every document per token.
+    """
+
+    def __init__(
+        self,
+        corpus: List[List[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.corpus_size = len(corpus)
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for doc_id, tokens in enumerate(corpus):
+            for token, tf in Counter(tokens).items():
+                ids, tfs = postings.setdefault(token, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        doc_len = np.array([len(tokens) for tokens in corpus], dtype=np.float64)
+        avgdl = float(doc_len.mean()) if self.corpus_size else 0.0
+        # Length-normalization term of the denominator, fixed per document
+        self._norm = k1 * (1 - b + b * doc_len / (avgdl or 1.0))
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.idf: Dict[str, float] = {}
+        negative_idfs = []
+        for token, (ids, tfs) in postings.items():
+            self._postings[token] = (
+                np.array(ids, dtype=np.int64),
+                np.array(tfs, dtype=np.float64),
+            )
+            idf = math.log(self.corpus_size - len(ids) + 0.5) - math.log(len(ids) + 0.5)
+            self.idf[token] = idf
+            if idf < 0:
+                negative_idfs.append(token)
+        average_idf = sum(self.idf.values()) / len(self.idf) if self.idf else 0.0
+        eps = epsilon * average_idf
+        for token in negative_idfs:
+            self.idf[token] = eps
+
+    def get_scores(self, query: List[str]) -> np.ndarray:
+        scores = np.zeros(self.corpus_size)
+        for token in query:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            doc_ids, tf = posting
+            scores[doc_ids] += self.idf[token] * (tf * (self.k1 + 1) / (tf + self._norm[doc_ids]))
+        return scores
+
+
 class WebBM25Searcher:
     """BM25 searcher built from uploaded documents."""
 
     def __init__(self, documents: list[dict]):
-        self.corpus_data = []
-        for i, doc in enumerate(documents):
-            self.corpus_data.append({
-                "id": f"doc_{i}",
-                "filename": doc["filename"],
-                "text": doc["content"],
-            })
-        self.documents = [d["text"] for d in self.corpus_data]
-        self.tokenized_corpus = [doc.lower().split() for doc in self.documents]
-        self.bm25 = BM25Okapi(self.tokenized_corpus)
+        # Parallel columns indexed by doc position; the doc id is f"doc_{i}"
+        self.filenames = [doc["filename"] for doc in documents]
+        self.documents = [doc["content"] for doc in documents]
+        self.bm25 = _PostingsBM25([text.lower().split() for text in self.documents])
 
     def search(self, query: str, k: int = 3) -> list[dict]:
         tokenized_query = query.lower().split()
         doc_scores = self.bm25.get_scores(tokenized_query)
-        top_indices = sorted(
-            range(len(doc_scores)), key=lambda i: doc_scores[i], reverse=True
-        )[:k]
+        k = min(k, len(doc_scores))
+        if k <= 0:
+            return []
+        # Linear-time selection of the k-th best score, then order only the
+        # candidates at or above it; keeping the whole tied group at the cut
+        # lets the stable sort break ties by document order, as a full sort would
+        threshold = doc_scores[np.argpartition(-doc_scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(doc_scores >= threshold)
+        top_indices = candidates[np.argsort(-doc_scores[candidates], kind="stable")][:k]
         results = []
         for i in top_indices:
-            if doc_scores[i] > 0:
-                doc = self.corpus_data[i]
-                text = doc["text"]
+            score = doc_scores[i]
+            if score > 0:
+                text = self.documents[i]
                 if len(text) > 3000:
                     text = text[:3000] + "\n... [truncated]"
                 results.append({
-                    "docid": doc["id"],
-                    "filename": doc["filename"],
-                    "score": round(float(doc_scores[i]), 4),
+                    "docid": f"doc_{i}",
+                    "filename": self.filenames[i],
+                    "score": round(float(score), 4),
                     "text": text,
                 })
         return results